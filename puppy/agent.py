@@ -1,9 +1,14 @@
 import os
+import sys
+import json
 import shutil
-import pickle
+import hashlib
 import logging
+import numpy as np
 from datetime import date
-from typing import Dict, Union, Any, List
+from functools import cached_property
+from typing import Dict, Union, Any, List, Tuple, Callable
+from concurrent.futures import ThreadPoolExecutor
 
 from abc import ABC, abstractmethod
 
@@ -13,6 +18,7 @@ from .portfolio import Portfolio
 from .chat import get_chat_end_points
 from .environment import market_info_type
 from .reflection import trading_reflection
+from .reflection_log import ReflectionLog
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -83,7 +89,9 @@ class LLMAgent(Agent):
         self.top_k = top_k
         self.agent_name = agent_name
         self.trading_symbol = trading_symbol
-        self.character_string = character_string
+        # Normalize whitespace once and intern: the string is reused as the
+        # query text on every step, so hashing and comparisons stay cheap.
+        self.character_string = sys.intern(" ".join(character_string.split()))
         self.chat_end_point_name = chat_end_point_name
         self.chat_end_point_config = chat_end_point_config
         self.look_back_window_size = look_back_window_size
@@ -102,12 +110,44 @@ class LLMAgent(Agent):
             end_point_type=chat_end_point_name,
             chat_config=chat_end_point_config
         )
-        self.guardrail_endpoint = self.chat_end_point.guardrail_endpoint()
 
-        # Reflection records
-        self.reflection_result_series_dict: Dict[date, Dict[str, Any]] = {}
+        # Reflection records, keyed by date.toordinal() — int keys hash and
+        # compare faster than date objects and serialize trivially. Records
+        # spool to an append-only log; only the recent window (enough to
+        # cover the feedback lookback) stays in memory.
+        self.reflection_result_series_dict = ReflectionLog(
+            keep_recent=max(4 * look_back_window_size, 16)
+        )
         self.access_counter: Dict[str, int] = {}
 
+        # Lazily computed embedding of character_string, reused across steps
+        self._character_string_emb: Union[np.ndarray, None] = None
+
+        # Single worker used to overlap the brain-side feedback update with
+        # the network-bound reflection LLM call.
+        self._feedback_worker = ThreadPoolExecutor(max_workers=1)
+
+        # Keyword arguments identical for every trading_reflection call,
+        # built once instead of per step. endpoint_func is added at the
+        # call site so guardrail_endpoint stays lazy.
+        self._reflection_kwargs_template: Dict[str, Any] = {
+            "symbol": self.trading_symbol,
+        }
+
+        # Fingerprint of the previous reflection's inputs and its result:
+        # when nothing feeding the prompt has changed, the LLM call is
+        # skipped and the previous result reused.
+        self._last_reflection_fingerprint: Union[bytes, None] = None
+        self._last_reflection_result: Union[Dict[str, Any], None] = None
+
+    @cached_property
+    def guardrail_endpoint(self) -> Callable[[str], str]:
+        """
+        Guardrails-compatible endpoint function, built on first use and
+        cached for the lifetime of the agent.
+        """
+        return self.chat_end_point.guardrail_endpoint()
+
     @classmethod
     def from_config(cls, config: Dict[str, Any]) -> "LLMAgent":
         """
@@ -127,6 +167,28 @@ class LLMAgent(Agent):
             look_back_window_size=config["general"]["look_back_window_size"],
         )
 
+    def _query_layers(
+        self,
+        layers: Tuple[str, ...],
+    ) -> Dict[str, Tuple[List[str], List[int]]]:
+        """
+        Query the given memory layers in one brain.query_multi call, reusing
+        the cached character_string embedding. Result memoization and its
+        invalidation live in BrainDB's query tier.
+        """
+        if self._character_string_emb is None:
+            self._character_string_emb = np.ascontiguousarray(
+                self.brain.embedding_function(self.character_string),
+                dtype="float32",
+            )
+        return self.brain.query_multi(
+            query_text=self.character_string,
+            top_k=self.top_k,
+            symbol=self.trading_symbol,
+            layers=layers,
+            query_emb=self._character_string_emb,
+        )
+
     def _handle_filings(self, cur_date: date, filing_q: str, filing_k: str) -> None:
         """
         Add fundamental text data to memory (mid or long) if present.
@@ -136,9 +198,12 @@ class LLMAgent(Agent):
             filing_q (str): Q-like filing or fundamental data.
             filing_k (str): K-like filing or fundamental data.
         """
-        if filing_q:
+        # Raw data can carry a {} placeholder instead of "" for missing
+        # filings, so check for non-empty strings explicitly rather than
+        # relying on truthiness alone.
+        if isinstance(filing_q, str) and filing_q:
             self.brain.add_memory_mid(self.trading_symbol, cur_date, filing_q)
-        if filing_k:
+        if isinstance(filing_k, str) and filing_k:
             self.brain.add_memory_long(self.trading_symbol, cur_date, filing_k)
 
     def _handle_news(self, cur_date: date, news: List[str]) -> None:
@@ -149,7 +214,7 @@ class LLMAgent(Agent):
             cur_date (date): Current date.
             news (List[str]): News articles or headlines.
         """
-        if news:
+        if isinstance(news, list) and news:
             self.brain.add_memory_short(self.trading_symbol, cur_date, news)
 
     def _query_info_for_reflection(self, run_mode: RunMode):
@@ -157,43 +222,24 @@ class LLMAgent(Agent):
         Query short, mid, long, and reflection memory from BrainDB
         for the relevant top_k items.
         """
-        logger.info(f"Querying memory for symbol: {self.trading_symbol}")
+        logger.info("Querying memory for symbol: %s", self.trading_symbol)
 
-        # Short
-        short_queried, short_memory_id = self.brain.query_short(
-            query_text=self.character_string,
-            top_k=self.top_k,
-            symbol=self.trading_symbol
-        )
-        for idx, memory_text in zip(short_memory_id, short_queried):
-            logger.info(f"ShortTerm - ID: {idx}, Memory: {memory_text}")
+        queried = self._query_layers(("short", "mid", "long", "reflection"))
 
-        # Mid
-        mid_queried, mid_memory_id = self.brain.query_mid(
-            query_text=self.character_string,
-            top_k=self.top_k,
-            symbol=self.trading_symbol
-        )
-        for idx, memory_text in zip(mid_memory_id, mid_queried):
-            logger.info(f"MidTerm - ID: {idx}, Memory: {memory_text}")
-
-        # Long
-        long_queried, long_memory_id = self.brain.query_long(
-            query_text=self.character_string,
-            top_k=self.top_k,
-            symbol=self.trading_symbol
-        )
-        for idx, memory_text in zip(long_memory_id, long_queried):
-            logger.info(f"LongTerm - ID: {idx}, Memory: {memory_text}")
+        short_queried, short_memory_id = queried["short"]
+        mid_queried, mid_memory_id = queried["mid"]
+        long_queried, long_memory_id = queried["long"]
+        reflection_queried, reflection_memory_id = queried["reflection"]
 
-        # Reflection
-        reflection_queried, reflection_memory_id = self.brain.query_reflection(
-            query_text=self.character_string,
-            top_k=self.top_k,
-            symbol=self.trading_symbol
-        )
-        for idx, memory_text in zip(reflection_memory_id, reflection_queried):
-            logger.info(f"ReflectionTerm - ID: {idx}, Memory: {memory_text}")
+        if logger.isEnabledFor(logging.INFO):
+            for idx, memory_text in zip(short_memory_id, short_queried):
+                logger.info("ShortTerm - ID: %s, Memory: %s", idx, memory_text)
+            for idx, memory_text in zip(mid_memory_id, mid_queried):
+                logger.info("MidTerm - ID: %s, Memory: %s", idx, memory_text)
+            for idx, memory_text in zip(long_memory_id, long_queried):
+                logger.info("LongTerm - ID: %s, Memory: %s", idx, memory_text)
+            for idx, memory_text in zip(reflection_memory_id, reflection_queried):
+                logger.info("ReflectionTerm - ID: %s, Memory: %s", idx, memory_text)
 
         if run_mode == RunMode.Test:
             # For test mode, also retrieve momentum info
@@ -231,23 +277,9 @@ class LLMAgent(Agent):
                 long_queried, long_memory_id,
                 reflection_queried, reflection_memory_id
             ) = self._query_info_for_reflection(run_mode=run_mode)
-
-            reflection_result = trading_reflection(
-                cur_date=cur_date,
-                symbol=self.trading_symbol,
-                run_mode=run_mode,
-                endpoint_func=self.guardrail_endpoint,
-                short_memory=short_queried,
-                short_memory_id=short_memory_id,
-                mid_memory=mid_queried,
-                mid_memory_id=mid_memory_id,
-                long_memory=long_queried,
-                long_memory_id=long_memory_id,
-                reflection_memory=reflection_queried,
-                reflection_memory_id=reflection_memory_id,
-                future_record=future_diff if future_diff is not None else 0.0
-            )
-
+            mode_kwargs: Dict[str, Any] = {
+                "future_record": future_diff if future_diff is not None else 0.0
+            }
         else:  # run_mode == RunMode.Test
             (
                 short_queried, short_memory_id,
@@ -256,12 +288,47 @@ class LLMAgent(Agent):
                 reflection_queried, reflection_memory_id,
                 momentum_value
             ) = self._query_info_for_reflection(run_mode=run_mode)
+            mode_kwargs = {"momentum": momentum_value}
+
+        # Fingerprint everything that feeds the prompt; when it matches the
+        # previous step, the LLM would see an identical prompt (dates aside)
+        # and the previous result is reused without a network call.
+        fingerprint = hashlib.blake2b(
+            repr((
+                run_mode.value,
+                short_memory_id, short_queried,
+                mid_memory_id, mid_queried,
+                long_memory_id, long_queried,
+                reflection_memory_id, reflection_queried,
+                sorted(mode_kwargs.items()),
+            )).encode(),
+            digest_size=16,
+        ).digest()
+
+        if (
+            fingerprint == self._last_reflection_fingerprint
+            and self._last_reflection_result is not None
+        ):
+            logger.info(
+                "Reflection inputs unchanged for %s on %s; reusing previous result.",
+                self.trading_symbol,
+                cur_date,
+            )
+            reflection_result = self._last_reflection_result
+            self._update_access_counter()
+            # The identical summary is already stored in reflection memory,
+            # so it is not re-added.
+        else:
+            # The LLM call below is network-bound, so run the brain-side
+            # feedback update concurrently. It is submitted only after the
+            # memory queries above have finished and joined before the
+            # reflection is written back, so the brain is never read and
+            # mutated at the same time.
+            feedback_future = self._feedback_worker.submit(self._update_access_counter)
 
             reflection_result = trading_reflection(
                 cur_date=cur_date,
-                symbol=self.trading_symbol,
                 run_mode=run_mode,
-                endpoint_func=self.guardrail_endpoint,
                 short_memory=short_queried,
                 short_memory_id=short_memory_id,
                 mid_memory=mid_queried,
@@ -270,46 +337,69 @@ class LLMAgent(Agent):
                 long_memory_id=long_memory_id,
                 reflection_memory=reflection_queried,
                 reflection_memory_id=reflection_memory_id,
-                momentum=momentum_value,
+                endpoint_func=self.guardrail_endpoint,
+                **self._reflection_kwargs_template,
+                **mode_kwargs,
             )
 
-        if reflection_result and ("summary_reason" in reflection_result):
-            self.brain.add_memory_reflection(
-                symbol=self.trading_symbol,
-                date=cur_date,
-                text=reflection_result["summary_reason"]
-            )
-        else:
-            logger.info("No reflection result or it did not converge properly.")
+            feedback_future.result()
+
+            if reflection_result and ("summary_reason" in reflection_result):
+                self.brain.add_memory_reflection(
+                    symbol=self.trading_symbol,
+                    date_added=cur_date,
+                    text=reflection_result["summary_reason"]
+                )
+            else:
+                logger.info("No reflection result or it did not converge properly.")
+
+            # Failed calls are not cached, so they are retried next step
+            if reflection_result:
+                self._last_reflection_fingerprint = fingerprint
+                self._last_reflection_result = reflection_result
 
-        self.reflection_result_series_dict[cur_date] = reflection_result
+        self.reflection_result_series_dict[cur_date.toordinal()] = reflection_result
 
         # Log reflection
         if run_mode == RunMode.Train:
             logger.info(
-                f"{self.trading_symbol} - {cur_date} (Train)\n"
-                f"Reflection Summary: {reflection_result.get('summary_reason')}\n"
+                "%s - %s (Train)\nReflection Summary: %s\n",
+                self.trading_symbol,
+                cur_date,
+                reflection_result.get("summary_reason"),
             )
         else:  # Test
             if reflection_result:
                 logger.info(
-                    f"{self.trading_symbol} - {cur_date} (Test)\n"
-                    f"Decision: {reflection_result.get('investment_decision')}\n"
-                    f"Reason: {reflection_result.get('summary_reason')}\n"
+                    "%s - %s (Test)\nDecision: %s\nReason: %s\n",
+                    self.trading_symbol,
+                    cur_date,
+                    reflection_result.get("investment_decision"),
+                    reflection_result.get("summary_reason"),
                 )
 
-    def _construct_train_actions(self, future_diff: float) -> Dict[str, int]:
+    def _construct_train_actions(
+        self,
+        future_diff: Union[float, np.ndarray, List[float]],
+    ) -> Union[Dict[str, int], List[Dict[str, int]]]:
         """
         For training: define an action based on future price difference.
+        Accepts either a single diff or a batch; a batch is resolved in one
+        vectorized np.where pass (useful for offline replays).
 
         Args:
-            future_diff (float): Next-step price difference.
+            future_diff: Next-step price difference(s).
 
         Returns:
-            Dict[str, int]: e.g. {"direction": +1, "quantity": 1} if price is expected to rise.
+            A single action dict, or a list of them for a batch, e.g.
+            {"direction": +1, "quantity": 1} if price is expected to rise.
         """
-        direction = 1 if future_diff > 0 else -1
-        return {"direction": direction, "quantity": 1}
+        if np.ndim(future_diff) == 0:
+            direction = 1 if future_diff > 0 else -1
+            return {"direction": direction, "quantity": 1}
+
+        directions = np.where(np.asarray(future_diff) > 0, 1, -1)
+        return [{"direction": int(d), "quantity": 1} for d in directions]
 
     def _portfolio_step(self, action: Dict[str, int]) -> None:
         """
@@ -328,10 +418,18 @@ class LLMAgent(Agent):
 
         if feedback["feedback"] != 0:
             cur_date = feedback["date"]
-            reflection_record = self.reflection_result_series_dict.get(cur_date, {})
+            reflection_record = self.reflection_result_series_dict.get(cur_date.toordinal(), {})
             if reflection_record:
                 self._update_memory_access_by_layer(feedback, reflection_record)
 
+    # (reflection record key, memory layer) pairs for feedback updates
+    LAYER_KEYS = (
+        ("short_memory_index", "short"),
+        ("middle_memory_index", "mid"),
+        ("long_memory_index", "long"),
+        ("reflection_memory_index", "reflection"),
+    )
+
     def _update_memory_access_by_layer(
         self,
         feedback: Dict[str, Union[int, date]],
@@ -340,22 +438,28 @@ class LLMAgent(Agent):
         """
         Update memory access counters across different memory layers
         (short, mid, long, reflection) if IDs are found in the reflection record.
-        """
-        def _update_sub(layer_key: str):
-            if layer_key in reflection_record:
-                layer_items = reflection_record[layer_key]
-                if isinstance(layer_items, list):
-                    memory_ids = [item["memory_index"] for item in layer_items]
-                    self.brain.update_access_count_with_feed_back(
-                        symbol=self.trading_symbol,
-                        ids=memory_ids,
-                        feedback=feedback["feedback"],  # type: ignore
-                    )
-
-        _update_sub("short_memory_index")
-        _update_sub("middle_memory_index")
-        _update_sub("long_memory_index")
-        _update_sub("reflection_memory_index")
+        All layers are collected in one pass and submitted as a single
+        batched brain update.
+        """
+        payload: Dict[str, List[int]] = {}
+        for layer_key, layer in self.LAYER_KEYS:
+            layer_items = reflection_record.get(layer_key)
+            if isinstance(layer_items, list) and layer_items:
+                # Ordered O(n) dedup: the prompt repeats each memory item,
+                # so the LLM often echoes the same index more than once.
+                payload[layer] = list(dict.fromkeys(
+                    item["memory_index"] for item in layer_items
+                ))
+
+        if payload:
+            self.brain.update_access_count_with_feed_back_batch(
+                symbol=self.trading_symbol,
+                layer_ids=payload,
+                feedback=feedback["feedback"],  # type: ignore
+            )
+
+    # investment_decision -> trade direction; unknown decisions fall back to hold
+    TEST_ACTION_DIRECTIONS = {"buy": 1, "hold": 0, "sell": -1}
 
     @staticmethod
     def _process_test_action(reflection_result: Dict[str, Any]) -> Dict[str, int]:
@@ -369,15 +473,7 @@ class LLMAgent(Agent):
             Dict[str, int]: The direction of the action, e.g., {"direction": 1} for buy.
         """
         decision = reflection_result.get("investment_decision")
-        if decision == "buy":
-            return {"direction": 1}
-        elif decision == "hold":
-            return {"direction": 0}
-        elif decision == "sell":
-            return {"direction": -1}
-        else:
-            # fallback
-            return {"direction": 0}
+        return {"direction": LLMAgent.TEST_ACTION_DIRECTIONS.get(decision, 0)}
 
     def step(
         self,
@@ -395,6 +491,11 @@ class LLMAgent(Agent):
         Raises:
             ValueError: If run_mode is not Train or Test.
         """
+        # Terminal steps carry no data: bail out before validating or
+        # unpacking so a done step costs nothing.
+        if market_info[-1]:
+            return
+
         if run_mode not in [RunMode.Train, RunMode.Test]:
             raise ValueError("run_mode should be either RunMode.Train or RunMode.Test")
 
@@ -405,39 +506,40 @@ class LLMAgent(Agent):
             filing_q,
             news,
             future_diff,
-            done
+            _,
         ) = market_info
 
-        if done:
-            return
-
         # 1. Handle fundamental filings (mid/long)
         self._handle_filings(cur_date, filing_q, filing_k)
 
         # 2. Handle news (short memory)
         self._handle_news(cur_date, news)
 
+        # Local aliases for the objects touched repeatedly below
+        brain = self.brain
+        portfolio = self.portfolio
+
         # 3. Update portfolio with market price
-        self.portfolio.update_market_info(new_market_price_info=cur_price, cur_date=cur_date)
+        portfolio.update_market_info(new_market_price_info=cur_price, cur_date=cur_date)
 
-        # 4. LLM reflection
+        # 4. LLM reflection; the memory-importance feedback update runs
+        #    concurrently with the LLM call inside _reflect. The feedback
+        #    window trails by look_back_window_size days, so it does not
+        #    depend on today's action being recorded yet.
         self._reflect(cur_date=cur_date, run_mode=run_mode, future_diff=future_diff)
 
         # 5. Decide action
         if run_mode == RunMode.Train:
             action = self._construct_train_actions(future_diff=future_diff)  # type: ignore
         else:
-            reflection_record = self.reflection_result_series_dict.get(cur_date, {})
+            reflection_record = self.reflection_result_series_dict.get(cur_date.toordinal(), {})
             action = self._process_test_action(reflection_record)
 
         # 6. Update portfolio with the chosen action
         self._portfolio_step(action)
 
-        # 7. Update memory importance
-        self._update_access_counter()
-
-        # 8. Step memory (decay, cleanup, jump)
-        self.brain.step()
+        # 7. Step memory (decay, cleanup, jump)
+        brain.step()
 
     def train_step(self) -> None:
         """
@@ -465,6 +567,8 @@ class LLMAgent(Agent):
         # Brain DB
         os.mkdir(os.path.join(path, "brain"))
 
+        # Small primitive state goes into plain JSON. The chat endpoint is not
+        # serialized at all: it is rebuilt from chat_end_point_config on load.
         state_dict = {
             "agent_name": self.agent_name,
             "character_string": self.character_string,
@@ -473,14 +577,18 @@ class LLMAgent(Agent):
             "trading_symbol": self.trading_symbol,
             "chat_end_point_name": self.chat_end_point_name,
             "chat_end_point_config": self.chat_end_point_config,
-            "portfolio": self.portfolio,
-            "chat_end_point": self.chat_end_point,
-            "reflection_result_series_dict": self.reflection_result_series_dict,
             "access_counter": self.access_counter,
         }
+        with open(os.path.join(path, "state.json"), "w") as f:
+            json.dump(state_dict, f)
+
+        # The reflection series grows with every step; the append-only log
+        # is stream-copied out rather than re-serialized as one dict.
+        self.reflection_result_series_dict.dump(
+            os.path.join(path, "reflections.jsonl.gz")
+        )
 
-        with open(os.path.join(path, "state_dict.pkl"), "wb") as f:
-            pickle.dump(state_dict, f)
+        self.portfolio.save_checkpoint(os.path.join(path, "portfolio.npz"))
 
         self.brain.save_checkpoint(os.path.join(path, "brain"), force=force)
 
@@ -495,8 +603,8 @@ class LLMAgent(Agent):
         Returns:
             LLMAgent: A restored LLMAgent instance.
         """
-        with open(os.path.join(path, "state_dict.pkl"), "rb") as f:
-            state_dict = pickle.load(f)
+        with open(os.path.join(path, "state.json"), "r") as f:
+            state_dict = json.load(f)
 
         brain = BrainDB.load_checkpoint(os.path.join(path, "brain"))
 
@@ -510,9 +618,14 @@ class LLMAgent(Agent):
             chat_end_point_config=state_dict["chat_end_point_config"],
         )
         # Restore the agent attributes
-        loaded_agent.chat_end_point = state_dict["chat_end_point"]
-        loaded_agent.portfolio = state_dict["portfolio"]
-        loaded_agent.reflection_result_series_dict = state_dict["reflection_result_series_dict"]
+        loaded_agent.portfolio = Portfolio.load_checkpoint(
+            os.path.join(path, "portfolio.npz")
+        )
+
+        loaded_agent.reflection_result_series_dict.restore(
+            os.path.join(path, "reflections.jsonl.gz")
+        )
+
         loaded_agent.access_counter = state_dict["access_counter"]
         loaded_agent.counter = state_dict["counter"]
 
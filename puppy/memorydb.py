@@ -1,10 +1,12 @@
 import os
 import faiss
 import pickle
+import hashlib
 import logging
 import shutil
 import numpy as np
 from datetime import date
+from functools import lru_cache
 from itertools import repeat
 from sortedcontainers import SortedList
 from typing import List, Union, Dict, Any, Tuple, Callable
@@ -30,6 +32,15 @@ file_handler.setFormatter(logging_formatter)
 logger.addHandler(file_handler)
 
 
+@lru_cache(maxsize=256)
+def _query_text_digest(query_text: str) -> bytes:
+    """
+    16-byte digest of a query text, memoized so the recurring
+    character-string queries hash once and cache keys stay small.
+    """
+    return hashlib.blake2b(query_text.encode(), digest_size=16).digest()
+
+
 class IdGeneratorFunc:
     """
     Simple callable class to generate unique integer IDs for memory records.
@@ -142,6 +153,8 @@ class MemoryDB:
                 key=lambda x: x["importance_recency_compound_score"]
             ),
             "index": index,
+            # id -> record, for O(1) lookups alongside the score ordering
+            "record_map": {},
         }
         self.universe[symbol] = temp_record
 
@@ -190,13 +203,15 @@ class MemoryDB:
                 "date": date_added,
             }
             self.universe[symbol]["score_memory"].add(new_record)
-            logger.info(f"Added memory: {new_record}")
+            self.universe[symbol]["record_map"][ids[i]] = new_record
+            logger.info("Added memory: %s", new_record)
 
     def query(
         self,
         query_text: str,
         top_k: int,
-        symbol: str
+        symbol: str,
+        query_emb: Union[np.ndarray, None] = None,
     ) -> Tuple[List[str], List[int]]:
         """
         Retrieve up to top_k relevant text entries for a symbol, based on
@@ -206,6 +221,9 @@ class MemoryDB:
             query_text (str): Query string to embed.
             top_k (int): Number of results to retrieve.
             symbol (str): Which symbol to query.
+            query_emb (np.ndarray, optional): Precomputed embedding of
+                query_text, shape (1, embedding_dim). If given, the
+                embedding step is skipped.
 
         Returns:
             (List[str], List[int]): The top_k memory texts and their IDs.
@@ -221,28 +239,32 @@ class MemoryDB:
         top_k = min(top_k, max_len)
         symbol_index = self.universe[symbol]["index"]
 
-        query_emb = self.embedding_function(query_text)
+        if query_emb is None:
+            query_emb = self.embedding_function(query_text)
+
+        # Results accumulate as structure-of-arrays: preallocated id/score
+        # buffers (both search passes yield at most top_k hits each) plus a
+        # parallel text list.
+        record_map = self.universe[symbol]["record_map"]
+        capacity = 2 * top_k
+        result_ids = np.empty(capacity, dtype=np.int64)
+        result_scores = np.empty(capacity, dtype=np.float32)
+        result_texts: List[str] = [""] * capacity
+        n_results = 0
+
         # Step 1: top_k by embedding similarity
         p1_dists, p1_ids = symbol_index.search(query_emb, top_k)
-        p1_dists, p1_ids = p1_dists[0].tolist(), p1_ids[0].tolist()
-
-        aggregated_texts = []
-        aggregated_scores = []
-        aggregated_ids = []
 
-        for dist_val, rec_id in zip(p1_dists, p1_ids):
-            cur_record = next(
-                (r for r in self.universe[symbol]["score_memory"] if r["id"] == rec_id),
-                None
-            )
+        for dist_val, rec_id in zip(p1_dists[0].tolist(), p1_ids[0].tolist()):
+            cur_record = record_map.get(rec_id)
             if cur_record is not None:
-                aggregated_texts.append(cur_record["text"])
-                aggregated_ids.append(cur_record["id"])
-                combined_score = self.compound_score_calc_func.merge_score(
+                result_ids[n_results] = rec_id
+                result_scores[n_results] = self.compound_score_calc_func.merge_score(
                     dist_val,
                     cur_record["importance_recency_compound_score"],
                 )
-                aggregated_scores.append(combined_score)
+                result_texts[n_results] = cur_record["text"]
+                n_results += 1
 
         # Step 2: also consider top_k items by importance+recency alone
         #        and re-rank them by combining with embedding similarity
@@ -257,37 +279,28 @@ class MemoryDB:
         temp_index = faiss.IndexIDMap2(temp_index)
         temp_index.add_with_ids(p2_embeddings, np.array(p2_ids))
 
-        p2_dists, p2_ids = temp_index.search(query_emb, top_k)
-        p2_dists, p2_ids = p2_dists[0].tolist(), p2_ids[0].tolist()
+        p2_dists, p2_found = temp_index.search(query_emb, top_k)
 
-        for dist_val, rec_id in zip(p2_dists, p2_ids):
-            cur_record = next(
-                (r for r in self.universe[symbol]["score_memory"] if r["id"] == rec_id),
-                None
-            )
+        for dist_val, rec_id in zip(p2_dists[0].tolist(), p2_found[0].tolist()):
+            cur_record = record_map.get(rec_id)
             if cur_record is not None:
-                combined_score = self.compound_score_calc_func.merge_score(
+                result_ids[n_results] = rec_id
+                result_scores[n_results] = self.compound_score_calc_func.merge_score(
                     dist_val,
-                    cur_record["importance_recency_compound_score"]
+                    cur_record["importance_recency_compound_score"],
                 )
-                aggregated_texts.append(cur_record["text"])
-                aggregated_scores.append(combined_score)
-                aggregated_ids.append(cur_record["id"])
-
-        # Rank final aggregated results by combined_score
-        score_rank = np.argsort(aggregated_scores)[::-1][:top_k]
-        ranked_texts = [aggregated_texts[i] for i in score_rank]
-        ranked_ids = [aggregated_ids[i] for i in score_rank]
-
-        # Remove duplicates while preserving order
-        seen = set()
-        final_texts = []
-        final_ids = []
-        for t, idx in zip(ranked_texts, ranked_ids):
-            if idx not in seen:
-                final_texts.append(t)
-                final_ids.append(idx)
-                seen.add(idx)
+                result_texts[n_results] = cur_record["text"]
+                n_results += 1
+
+        # Rank by combined score, truncate to top_k, then drop duplicate ids
+        # keeping the best-ranked occurrence (all vectorized on the buffers)
+        score_rank = np.argsort(result_scores[:n_results])[::-1][:top_k]
+        ranked_ids = result_ids[score_rank]
+        _, first_pos = np.unique(ranked_ids, return_index=True)
+        keep_pos = np.sort(first_pos)
+
+        final_ids = ranked_ids[keep_pos].tolist()
+        final_texts = [result_texts[score_rank[pos]] for pos in keep_pos]
 
         return final_texts, final_ids
 
@@ -312,21 +325,21 @@ class MemoryDB:
         if symbol not in self.universe:
             return []
         success_ids = []
-        score_memory = self.universe[symbol]["score_memory"]
+        record_map = self.universe[symbol]["record_map"]
         for rec_id, fb in zip(ids, feedback):
-            for record in score_memory:
-                if record["id"] == rec_id:
-                    record["access_counter"] += fb
-                    record["importance_score"] = self.importance_score_change_access_counter(
-                        access_counter=record["access_counter"],
-                        importance_score=record["importance_score"],
-                    )
-                    record["importance_recency_compound_score"] = self.compound_score_calc_func.recency_and_importance_score(
-                        recency_score=record["recency_score"],
-                        importance_score=record["importance_score"]
-                    )
-                    success_ids.append(rec_id)
-                    break
+            record = record_map.get(rec_id)
+            if record is None:
+                continue
+            record["access_counter"] += fb
+            record["importance_score"] = self.importance_score_change_access_counter(
+                access_counter=record["access_counter"],
+                importance_score=record["importance_score"],
+            )
+            record["importance_recency_compound_score"] = self.compound_score_calc_func.recency_and_importance_score(
+                recency_score=record["recency_score"],
+                importance_score=record["importance_score"]
+            )
+            success_ids.append(rec_id)
         return success_ids
 
     def _decay(self) -> None:
@@ -375,6 +388,9 @@ class MemoryDB:
                 )
                 self.universe[symbol]["score_memory"] = new_list
                 self.universe[symbol]["index"].remove_ids(np.array(to_remove))
+                record_map = self.universe[symbol]["record_map"]
+                for rec_id in to_remove:
+                    record_map.pop(rec_id, None)
                 removed_ids.extend(to_remove)
         return removed_ids
 
@@ -438,6 +454,9 @@ class MemoryDB:
                 key=lambda x: x["importance_recency_compound_score"]
             )
             self.universe[symbol]["score_memory"] = new_mem
+            record_map = self.universe[symbol]["record_map"]
+            for rec_id in symbol_to_delete:
+                record_map.pop(rec_id, None)
 
             if jump_list_up:
                 jump_dict_up[symbol] = {
@@ -468,9 +487,11 @@ class MemoryDB:
                 self.add_new_symbol(symbol)
 
             new_ids = []
+            record_map = self.universe[symbol]["record_map"]
             # If going up, reset recency?
             for rec in data["jump_object_list"]:
                 new_ids.append(rec["id"])
+                record_map[rec["id"]] = rec
                 if direction == "up":
                     rec["recency_score"] = self.recency_score_init_func()
                     rec["delta"] = 0
@@ -543,6 +564,10 @@ class MemoryDB:
                 loaded_universe[sym]["score_memory"],
                 key=lambda x: x["importance_recency_compound_score"]
             )
+            loaded_universe[sym]["record_map"] = {
+                record["id"]: record
+                for record in loaded_universe[sym]["score_memory"]
+            }
             del loaded_universe[sym]["index_save_path"]
 
         # Construct the new MemoryDB
@@ -569,6 +594,13 @@ class BrainDB:
     """
     Aggregates four MemoryDB objects (short, mid, long, reflection)
     for a single agent, enabling coordinated memory jumps and decays.
+
+    Queries go through a small in-process result tier: identical
+    (symbol, layer, query_text, top_k) lookups are served from a dict
+    until a write (memory addition, feedback update, or jump) invalidates
+    the symbol's entries. Cached rankings may lag behind pure score decay
+    between writes, which is an accepted tradeoff for skipping repeated
+    embedding and index searches.
     """
 
     def __init__(
@@ -595,6 +627,16 @@ class BrainDB:
         self.long_term_memory = long_term_memory
         self.reflection_memory = reflection_memory
 
+        self.memory_layers: Dict[str, MemoryDB] = {
+            "short": short_term_memory,
+            "mid": mid_term_memory,
+            "long": long_term_memory,
+            "reflection": reflection_memory,
+        }
+
+        # Hot tier: (symbol, layer, query-text digest, top_k) -> (texts, ids)
+        self._query_result_cache: Dict[Tuple[str, str, bytes, int], Tuple[List[str], List[int]]] = {}
+
         self.removed_ids: List[int] = []
 
     @classmethod
@@ -685,37 +727,125 @@ class BrainDB:
             reflection_memory=reflection_db,
         )
 
+    def _invalidate_query_cache(self, symbol: str) -> None:
+        """
+        Drop cached query results for a symbol. Called on every write path,
+        since new or rescored records may change query rankings.
+        """
+        self._query_result_cache = {
+            key: value
+            for key, value in self._query_result_cache.items()
+            if key[0] != symbol
+        }
+
+    def _query_with_cache(
+        self,
+        layer: str,
+        query_text: str,
+        top_k: int,
+        symbol: str,
+        query_emb: Union[np.ndarray, None] = None,
+    ) -> Tuple[List[str], List[int]]:
+        """
+        Serve one layer query from the hot tier, falling back to the layer's
+        MemoryDB on a miss and caching the result.
+        """
+        key = (symbol, layer, _query_text_digest(query_text), top_k)
+        cached = self._query_result_cache.get(key)
+        if cached is None:
+            cached = self.memory_layers[layer].query(
+                query_text, top_k, symbol, query_emb=query_emb
+            )
+            self._query_result_cache[key] = cached
+        return cached
+
     def add_memory_short(self, symbol: str, date_added: date, text: Union[List[str], str]) -> None:
         """Add short-term memory record."""
         self.short_term_memory.add_memory(symbol, date_added, text)
+        self._invalidate_query_cache(symbol)
 
     def add_memory_mid(self, symbol: str, date_added: date, text: Union[List[str], str]) -> None:
         """Add mid-term memory record."""
         self.mid_term_memory.add_memory(symbol, date_added, text)
+        self._invalidate_query_cache(symbol)
 
     def add_memory_long(self, symbol: str, date_added: date, text: Union[List[str], str]) -> None:
         """Add long-term memory record."""
         self.long_term_memory.add_memory(symbol, date_added, text)
+        self._invalidate_query_cache(symbol)
 
     def add_memory_reflection(self, symbol: str, date_added: date, text: Union[List[str], str]) -> None:
         """Add reflection-level memory record."""
         self.reflection_memory.add_memory(symbol, date_added, text)
+        self._invalidate_query_cache(symbol)
 
     def query_short(self, query_text: str, top_k: int, symbol: str) -> Tuple[List[str], List[int]]:
         """Query short-term memory."""
-        return self.short_term_memory.query(query_text, top_k, symbol)
+        return self._query_with_cache("short", query_text, top_k, symbol)
 
     def query_mid(self, query_text: str, top_k: int, symbol: str) -> Tuple[List[str], List[int]]:
         """Query mid-term memory."""
-        return self.mid_term_memory.query(query_text, top_k, symbol)
+        return self._query_with_cache("mid", query_text, top_k, symbol)
 
     def query_long(self, query_text: str, top_k: int, symbol: str) -> Tuple[List[str], List[int]]:
         """Query long-term memory."""
-        return self.long_term_memory.query(query_text, top_k, symbol)
+        return self._query_with_cache("long", query_text, top_k, symbol)
 
     def query_reflection(self, query_text: str, top_k: int, symbol: str) -> Tuple[List[str], List[int]]:
         """Query reflection-level memory."""
-        return self.reflection_memory.query(query_text, top_k, symbol)
+        return self._query_with_cache("reflection", query_text, top_k, symbol)
+
+    def query_multi(
+        self,
+        query_text: str,
+        top_k: int,
+        symbol: str,
+        layers: Union[Tuple[str, ...], List[str]] = ("short", "mid", "long", "reflection"),
+        query_emb: Union[np.ndarray, None] = None,
+    ) -> Dict[str, Tuple[List[str], List[int]]]:
+        """
+        Query several memory layers with a single query text, embedding the
+        text only once and reusing the embedding for every layer's index search.
+
+        Args:
+            query_text (str): Query string to embed.
+            top_k (int): Number of results to retrieve per layer.
+            symbol (str): Which symbol to query.
+            layers: Memory layers to query ("short", "mid", "long", "reflection").
+            query_emb (np.ndarray, optional): Precomputed embedding of
+                query_text, shape (1, embedding_dim). If given, the
+                embedding step is skipped entirely.
+
+        Returns:
+            Dict[str, Tuple[List[str], List[int]]]: Per-layer (texts, ids).
+        """
+        results: Dict[str, Tuple[List[str], List[int]]] = {}
+        missing: List[str] = []
+        query_digest = _query_text_digest(query_text)
+        for layer in layers:
+            cached = self._query_result_cache.get((symbol, layer, query_digest, top_k))
+            if cached is not None:
+                results[layer] = cached
+            else:
+                missing.append(layer)
+
+        if missing:
+            # Embed only if some uncached layer actually has data; an empty
+            # layer early-returns from MemoryDB.query without the embedding.
+            if query_emb is None and any(
+                symbol in self.memory_layers[layer].universe
+                and len(self.memory_layers[layer].universe[symbol]["score_memory"]) > 0
+                for layer in missing
+            ):
+                query_emb = np.ascontiguousarray(
+                    self.embedding_function(query_text), dtype="float32"
+                )
+            for layer in missing:
+                results[layer] = self._query_with_cache(
+                    layer, query_text, top_k, symbol, query_emb=query_emb
+                )
+
+        return results
 
     def update_access_count_with_feed_back(
         self,
@@ -768,35 +898,63 @@ class BrainDB:
             )
             updated_ids.extend(reflection_updated)
 
+        if updated_ids:
+            self._invalidate_query_cache(symbol)
+
+    def update_access_count_with_feed_back_batch(
+        self,
+        symbol: str,
+        layer_ids: Dict[str, List[int]],
+        feedback: int,
+    ) -> None:
+        """
+        Apply one feedback value to memory ids collected from several layers.
+        The per-layer id lists are merged (order preserved, duplicates
+        dropped) and dispatched in a single cascading update, replacing one
+        update call per layer.
+
+        Args:
+            layer_ids (Dict[str, List[int]]): Memory layer -> record ids.
+        """
+        merged_ids = list(dict.fromkeys(
+            rec_id for ids in layer_ids.values() for rec_id in ids
+        ))
+        if merged_ids:
+            self.update_access_count_with_feed_back(symbol, merged_ids, feedback)
+
+    @staticmethod
+    def _log_memory_universe(memory: MemoryDB, label: str) -> None:
+        """
+        Dump every record of a memory layer to the log. The whole walk is
+        skipped when INFO logging is disabled, since the loops exist only
+        for logging.
+        """
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        for sym in memory.universe:
+            logger.info("%s memory for %s:", label, sym)
+            for rec in memory.universe[sym]["score_memory"]:
+                logger.info("%s", rec)
+
     def step(self) -> None:
         """
         Advance all memory layers one step (decay, clean up).
         Then handle memory jumps: short->mid, mid->long, mid->short, long->mid, etc.
         """
+        removed_before = len(self.removed_ids)
+
         # 1. Decay + Cleanup
         self.removed_ids.extend(self.short_term_memory.step())
-        for sym in self.short_term_memory.universe:
-            logger.info(f"ShortTerm memory for {sym}:")
-            for rec in self.short_term_memory.universe[sym]["score_memory"]:
-                logger.info(f"{rec}")
+        self._log_memory_universe(self.short_term_memory, "ShortTerm")
 
         self.removed_ids.extend(self.mid_term_memory.step())
-        for sym in self.mid_term_memory.universe:
-            logger.info(f"MidTerm memory for {sym}:")
-            for rec in self.mid_term_memory.universe[sym]["score_memory"]:
-                logger.info(f"{rec}")
+        self._log_memory_universe(self.mid_term_memory, "MidTerm")
 
         self.removed_ids.extend(self.long_term_memory.step())
-        for sym in self.long_term_memory.universe:
-            logger.info(f"LongTerm memory for {sym}:")
-            for rec in self.long_term_memory.universe[sym]["score_memory"]:
-                logger.info(f"{rec}")
+        self._log_memory_universe(self.long_term_memory, "LongTerm")
 
         self.removed_ids.extend(self.reflection_memory.step())
-        for sym in self.reflection_memory.universe:
-            logger.info(f"ReflectionTerm memory for {sym}:")
-            for rec in self.reflection_memory.universe[sym]["score_memory"]:
-                logger.info(f"{rec}")
+        self._log_memory_universe(self.reflection_memory, "ReflectionTerm")
 
         # 2. Perform memory jumps
         logger.info("Starting memory jump cycle...")
@@ -809,10 +967,11 @@ class BrainDB:
             # Accept "up" jumps into mid, "down" is empty for short
             self.mid_term_memory.accept_jump(up_dict, "up")
             # For short, a "down" jump doesn't make sense, but we capture it for logs:
-            for sym in up_dict:
-                logger.info(f"Up-jump from short => mid for {sym}: {up_dict[sym]['jump_object_list']}")
-            for sym in down_dict:
-                logger.info(f"Down-jump from short => ??? for {sym}: {down_dict[sym]['jump_object_list']}")
+            if logger.isEnabledFor(logging.INFO):
+                for sym in up_dict:
+                    logger.info("Up-jump from short => mid for %s: %s", sym, up_dict[sym]["jump_object_list"])
+                for sym in down_dict:
+                    logger.info("Down-jump from short => ??? for %s: %s", sym, down_dict[sym]["jump_object_list"])
 
             logger.info("Short => Mid memory jump done.")
 
@@ -824,10 +983,11 @@ class BrainDB:
             self.long_term_memory.accept_jump(up_dict, "up")
             self.short_term_memory.accept_jump(down_dict, "down")
 
-            for sym in up_dict:
-                logger.info(f"Up-jump from mid => long for {sym}: {up_dict[sym]['jump_object_list']}")
-            for sym in down_dict:
-                logger.info(f"Down-jump from mid => short for {sym}: {down_dict[sym]['jump_object_list']}")
+            if logger.isEnabledFor(logging.INFO):
+                for sym in up_dict:
+                    logger.info("Up-jump from mid => long for %s: %s", sym, up_dict[sym]["jump_object_list"])
+                for sym in down_dict:
+                    logger.info("Down-jump from mid => short for %s: %s", sym, down_dict[sym]["jump_object_list"])
 
             logger.info("Mid => Long + Short memory jump done.")
 
@@ -839,15 +999,21 @@ class BrainDB:
             # For long, "up" doesn't happen. "down" => mid
             self.mid_term_memory.accept_jump(down_dict, "down")
 
-            for sym in up_dict:
-                logger.info(f"Up-jump from long => ??? for {sym}: {up_dict[sym]['jump_object_list']}")
-            for sym in down_dict:
-                logger.info(f"Down-jump from long => mid for {sym}: {down_dict[sym]['jump_object_list']}")
+            if logger.isEnabledFor(logging.INFO):
+                for sym in up_dict:
+                    logger.info("Up-jump from long => ??? for %s: %s", sym, up_dict[sym]["jump_object_list"])
+                for sym in down_dict:
+                    logger.info("Down-jump from long => mid for %s: %s", sym, down_dict[sym]["jump_object_list"])
 
             logger.info("Long => Mid memory jump done.")
 
         logger.info("Memory jump cycle complete.")
 
+        # Cleanup or jumps moved records between layers: cached query
+        # results may now reference them, so drop the hot tier.
+        if len(self.removed_ids) != removed_before:
+            self._query_result_cache.clear()
+
     def save_checkpoint(self, path: str, force: bool = False) -> None:
         """
         Save the entire BrainDB to disk, including the four memory layers.
@@ -1,3 +1,4 @@
+import json
 import polars as pl
 import numpy as np
 from datetime import date
@@ -97,6 +98,65 @@ class Portfolio:
                 "date": self.date_series[-self.lookback_window_size],
             }
 
+    def save_checkpoint(self, path: str) -> None:
+        """
+        Save a compact column-oriented snapshot of the portfolio. The series
+        are stored as NumPy arrays (dates as ordinals) and the scalar state
+        as a JSON string, avoiding a pickle of the whole object.
+        """
+        meta = json.dumps({
+            "symbol": self.symbol,
+            "lookback_window_size": self.lookback_window_size,
+            "cur_date": self.cur_date.toordinal() if self.cur_date else None,
+            "market_price": self.market_price,
+            "day_count": self.day_count,
+            "holding_shares": self.holding_shares,
+        })
+        action_dates = np.array(
+            [d.toordinal() for d in self.action_series], dtype=np.int64
+        )
+        action_directions = np.array(
+            list(self.action_series.values()), dtype=np.int64
+        )
+        np.savez(
+            path,
+            meta=meta,
+            date_series=np.array([d.toordinal() for d in self.date_series], dtype=np.int64),
+            market_price_series=self.market_price_series,
+            portfolio_share_series=self.portfolio_share_series,
+            action_dates=action_dates,
+            action_directions=action_directions,
+        )
+
+    @classmethod
+    def load_checkpoint(cls, path: str) -> "Portfolio":
+        """
+        Restore a Portfolio from a snapshot written by save_checkpoint.
+        """
+        data = np.load(path)
+        meta = json.loads(str(data["meta"]))
+
+        portfolio = cls(
+            symbol=meta["symbol"],
+            lookback_window_size=meta["lookback_window_size"],
+        )
+        portfolio.cur_date = (
+            date.fromordinal(meta["cur_date"]) if meta["cur_date"] else None
+        )
+        portfolio.market_price = meta["market_price"]
+        portfolio.day_count = meta["day_count"]
+        portfolio.holding_shares = meta["holding_shares"]
+        portfolio.date_series = [
+            date.fromordinal(int(d)) for d in data["date_series"]
+        ]
+        portfolio.market_price_series = data["market_price_series"]
+        portfolio.portfolio_share_series = data["portfolio_share_series"]
+        portfolio.action_series = {
+            date.fromordinal(int(d)): int(a)
+            for d, a in zip(data["action_dates"], data["action_directions"])
+        }
+        return portfolio
+
     def get_moment(self, moment_window: int = 3) -> Union[Dict[str, int], None]:
         """
         Return a simple sign of the last X days' price changes.
@@ -0,0 +1,99 @@
+import json
+import gzip
+import mmap
+import shutil
+import tempfile
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Tuple, Union
+
+
+class ReflectionLog:
+    """
+    Append-only store for per-date reflection results.
+
+    Every record is written to a JSON-lines spool file the moment it is
+    added, and only the most recent `keep_recent` records stay in memory,
+    so the agent's footprint stays bounded over long simulations. Records
+    that have fallen out of the in-memory window are recovered on demand
+    by scanning the mmap'd spool file. Keys are ordinal dates
+    (date.toordinal()).
+    """
+
+    def __init__(self, keep_recent: int = 64) -> None:
+        """
+        Args:
+            keep_recent (int): Number of most recent records kept in memory.
+        """
+        self.keep_recent = keep_recent
+        self._recent: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._spool = tempfile.NamedTemporaryFile(
+            mode="w+b", prefix="reflections_", suffix=".jsonl"
+        )
+
+    def __setitem__(self, date_ordinal: int, record: Dict[str, Any]) -> None:
+        """
+        Append a record to the spool and the in-memory window.
+        """
+        line = json.dumps({"date": date_ordinal, "result": record}, default=str)
+        self._spool.write(line.encode())
+        self._spool.write(b"\n")
+        self._spool.flush()
+
+        self._recent[date_ordinal] = record
+        self._recent.move_to_end(date_ordinal)
+        while len(self._recent) > self.keep_recent:
+            self._recent.popitem(last=False)
+
+    def get(
+        self,
+        date_ordinal: int,
+        default: Union[Dict[str, Any], None] = None,
+    ) -> Union[Dict[str, Any], None]:
+        """
+        Return the record for a date, falling back to a scan of the spool
+        file for records older than the in-memory window. The latest entry
+        for a date wins, matching dict overwrite semantics.
+        """
+        if date_ordinal in self._recent:
+            return self._recent[date_ordinal]
+
+        found = default
+        with open(self._spool.name, "rb") as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty spool
+                return default
+            with mm:
+                for line in iter(mm.readline, b""):
+                    record = json.loads(line)
+                    if record["date"] == date_ordinal:
+                        found = record["result"]
+        return found
+
+    def items(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Stream (date_ordinal, record) pairs in append order. Dates written
+        more than once appear once per write; use get() for latest-wins reads.
+        """
+        with open(self._spool.name, "rb") as f:
+            for line in f:
+                record = json.loads(line)
+                yield record["date"], record["result"]
+
+    def dump(self, path: str) -> None:
+        """
+        Compress the spool into a checkpoint file at path. This is a raw
+        stream copy: no record is deserialized on the way out.
+        """
+        self._spool.flush()
+        with open(self._spool.name, "rb") as src, gzip.open(path, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+
+    def restore(self, path: str) -> None:
+        """
+        Replay a checkpoint file produced by dump() into this log.
+        """
+        with gzip.open(path, "rt") as f:
+            for line in f:
+                record = json.loads(line)
+                self[record["date"]] = record["result"]